@@ -0,0 +1,91 @@
+import os
+import queue
+import threading
+import time
+import weakref
+
+
+_senders = weakref.WeakSet()  # fork 後需要在子程序中重新啟動發送線程的處理器
+
+
+class BackgroundSenderMixin:
+    """
+    背景發送線程的共用實作，供 BatchedSocketHandler 與 EmailNotificationHandler 使用
+
+    處理器在 __init__ 中調用 _init_sender()，emit 以 _enqueue() 入列，close 以 _stop_sender()
+    停止線程；子類實作 _run()，從 self._queue 取出項目直到 None，並對每個取出的項目調用 task_done()。
+    需要在 fork 後重建連線的子類覆寫 _reset_after_fork()
+    """
+
+    SENDER_NAME = 'background-sender'  # 發送線程名稱
+    FLUSH_TIMEOUT = 5.0                # flush() 等待佇列送完的時間上限（秒）
+
+    def _init_sender(self, queue_size=0):
+        self._queue = queue.Queue(queue_size)
+        self._state_lock = threading.Lock()  # 保證關閉後不再有項目排在結束標記之後
+        self._closing = False
+        self._start_sender()
+        _senders.add(self)
+
+    def _start_sender(self):
+        self._sender = threading.Thread(
+            target=self._run, name=self.SENDER_NAME, daemon=True
+        )
+        self._sender.start()
+
+    def _enqueue(self, item) -> bool:
+        """將項目放入佇列；處理器已關閉或佇列已滿時返回 False，由調用端同步處理"""
+        with self._state_lock:
+            if self._closing:
+                return False
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                return False
+
+    def _stop_sender(self):
+        """標記為已關閉並放入結束標記，等待發送線程處理完剩餘項目"""
+        with self._state_lock:
+            if self._closing:
+                return
+            self._closing = True
+            stop = self._sender.is_alive()
+            if stop:
+                self._queue.put(None)
+        if stop:
+            self._sender.join()
+
+    def flush(self):
+        """
+        等待佇列中的項目送出，最多等待 FLUSH_TIMEOUT 秒
+        """
+        deadline = time.monotonic() + self.FLUSH_TIMEOUT
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks and self._sender.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+    def _after_fork_in_child(self):
+        """
+        fork 後子程序不會繼承發送線程：捨棄父程序尚未送出的項目（由父程序負責），
+        重建連線狀態並啟動子程序自己的發送線程
+        """
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._state_lock = threading.Lock()
+        self._reset_after_fork()
+        if not self._closing:
+            self._start_sender()
+
+    def _reset_after_fork(self):
+        """子類覆寫以重建繼承自父程序的連線"""
+
+
+def _after_fork_in_child():
+    for sender in list(_senders):
+        sender._after_fork_in_child()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
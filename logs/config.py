@@ -1,9 +1,26 @@
+import atexit
+from collections.abc import Mapping
+import functools
 import logging
 import os
-from logging.handlers import RotatingFileHandler, SocketHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-import inspect
+from queue import Full, Queue
+import sys
+import threading
+import time
+import weakref
 from .formatters import JsonFormatter, StandardFormatter, ColoredFormatter, FileFormatter
+from .logstash_handler import BatchedDatagramHandler, BatchedSocketHandler
+
+# 共用日誌目錄，於模組匯入時建立一次
+LOG_DIR = Path(__file__).resolve().parent.parent / 'logs'
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# 保護共用處理器的建立與日誌記錄器的配置
+_setup_lock = threading.RLock()
+
+QUEUE_SIZE = 10000  # 背景線程佇列容量，滿時調用端同步處理記錄，避免積壓無限增長
 
 def setup_logger(name=__name__, log_level=logging.DEBUG, module_log=True):
     """
@@ -14,60 +31,128 @@ def setup_logger(name=__name__, log_level=logging.DEBUG, module_log=True):
     log_level (int): 日誌級別，預設為 DEBUG (10)
     module_log (bool): 是否在模組目錄生成單獨日誌文件，預設為 True
     
+    訊息請使用 %-style 參數 (logger.debug("x=%s", x)) 而非 f-string，
+    未啟用的級別不會合併訊息，且合併可延遲到背景線程進行
+    
     返回：
     logging.Logger: 配置完成的日誌記錄器實例
     """
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
 
-    # 防止重複添加 handler (避免多線程環境下的重複配置)
-    if logger.handlers:
-        return logger
+    with _setup_lock:
+        # 防止重複添加 handler (避免多線程環境下的重複配置)
+        if logger.handlers:
+            return logger
 
-    # 確保日誌目錄存在
-    log_dir = Path(__file__).parent.parent / 'logs'
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 定義不同級別的日誌文件
-    log_files = {
-        logging.DEBUG: log_dir / "debug.log",
-        logging.INFO: log_dir / "info.log",
-        logging.WARNING: log_dir / "warning.log",
-        logging.ERROR: log_dir / "error.log",
-        logging.CRITICAL: log_dir / "critical.log"
-    }
-    
-    # 創建每一個日誌級別的文件處理器
-    for log_level, log_file in log_files.items():
-        # 創建級別過濾器
-        level_filter = LevelFilter(log_level)
+        module_log_file = None
+        if module_log:
+            try:
+                # 獲取調用者的文件路徑 (直接取調用者幀，避免 inspect.stack() 遍歷整個堆疊並讀取源碼)
+                caller_file = Path(sys._getframe(1).f_code.co_filename)
+                # 使用實際文件名而非模塊名，日誌寫在調用模塊所在目錄
+                module_log_file = caller_file.parent / f"{caller_file.stem}.log"
+            except (ValueError, AttributeError):
+                # 無法確定調用者位置，跳過模塊專屬日誌
+                pass
+
+        logger.addHandler(_queue_handler(module_log_file))
+
+    return logger
+
+@functools.cache
+def _start_listener():
+    """
+    啟動全域背景線程並返回之
+
+    所有日誌記錄器共用同一線程，調用端線程只需將記錄放入佇列，格式化與 I/O 由背景線程完成；
+    fork 後子程序清除此快取，於下一筆記錄時啟動子程序自己的線程
+    """
+    listener = LocalQueueListener(Queue(QUEUE_SIZE))
+    listener.start()
+    return listener
+
+_dispatch_lock = threading.Lock()  # 保護入列與停止背景線程，避免記錄在停止後才入列而遺失
+_synchronous = False               # 背景線程停止後，記錄改為在調用端同步處理
+_queue_handlers = weakref.WeakSet()
+
+def _stop_listener():
+    """
+    停止背景線程並處理完佇列中剩餘的記錄，再 flush 所有目標處理器
+
+    於執行緒關閉 (threading._shutdown，multiprocessing 子程序結束時也會執行) 及 atexit 時調用
+    """
+    global _synchronous
+    with _dispatch_lock:
+        if _synchronous:
+            return
+        _synchronous = True
+        listener = _start_listener() if _start_listener.cache_info().currsize else None
+    # 標記後不再有記錄入列，在鎖外停止以免處理器中的日誌調用死鎖
+    if listener is not None:
+        listener.stop()
+
+    handlers = {handler for queue_handler in list(_queue_handlers) for handler in queue_handler.handlers}
+    for handler in handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+# 程式結束時清空佇列，確保日誌完整寫出
+atexit.register(_stop_listener)
+if hasattr(threading, '_register_atexit'):
+    # multiprocessing 子程序結束時不執行 atexit，但會執行 threading 的關閉鉤子
+    threading._register_atexit(_stop_listener)
+
+@functools.cache
+def _file_logging_enabled():
+    """本地文件記錄是否啟用 (ENABLE_FILE_LOGGING)，環境變數只在首次調用時讀取"""
+    return os.getenv('ENABLE_FILE_LOGGING', 'true').lower() == 'true'
+
+@functools.cache
+def _build_shared_handlers():
+    """
+    建立所有日誌記錄器共用的處理器，環境變數只在首次調用時讀取
+
+    返回：
+    tuple: 共用處理器
+    """
+    handlers = []
+
+    # 本地文件記錄配置 (可通過環境變數禁用)
+    if _file_logging_enabled():
+        # 各級別獨立日誌文件 (需顯式啟用，application.log 已包含所有級別)
+        if os.getenv('ENABLE_LEVEL_LOGGING', 'false').lower() == 'true':
+            # 定義不同級別的日誌文件
+            log_files = {
+                logging.DEBUG: LOG_DIR / "debug.log",
+                logging.INFO: LOG_DIR / "info.log",
+                logging.WARNING: LOG_DIR / "warning.log",
+                logging.ERROR: LOG_DIR / "error.log",
+                logging.CRITICAL: LOG_DIR / "critical.log"
+            }
+            
+            # 以單一處理器依級別分流至各級別文件（限制文件大小為 10MB，最多保留 5 個備份）
+            level_handler = LevelRoutingFileHandler(
+                log_files,
+                maxBytes=10*1024*1024,  # 10MB
+                backupCount=5,
+                encoding='utf-8'
+            )
+            level_handler.setFormatter(FileFormatter())
+            handlers.append(level_handler)
         
-        # 創建旋轉文件處理器（限制文件大小為 10MB，最多保留 5 個備份）
-        file_handler = RotatingFileHandler(
-            filename=log_file,
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
+        # 保留一個統一的日誌文件，包含所有級別的日誌
+        all_logs_handler = FastRotatingFileHandler(
+            filename=LOG_DIR / "application.log",
+            maxBytes=20*1024*1024,  # 20MB
+            backupCount=10,
             encoding='utf-8'
         )
-        
-        # 設置級別和格式
-        file_handler.setLevel(log_level)
-        file_handler.setFormatter(FileFormatter())
-        file_handler.addFilter(level_filter)
-        
-        # 添加到 logger
-        logger.addHandler(file_handler)
-    
-    # 保留一個統一的日誌文件，包含所有級別的日誌
-    all_logs_handler = RotatingFileHandler(
-        filename=log_dir / "application.log",
-        maxBytes=20*1024*1024,  # 20MB
-        backupCount=10,
-        encoding='utf-8'
-    )
-    all_logs_handler.setFormatter(FileFormatter())
-    logger.addHandler(all_logs_handler)
-    
+        all_logs_handler.setFormatter(FileFormatter())
+        handlers.append(all_logs_handler)
+
     # 添加控制台處理器
     console_handler = logging.StreamHandler()
     console_formatter = ColoredFormatter(
@@ -75,125 +160,327 @@ def setup_logger(name=__name__, log_level=logging.DEBUG, module_log=True):
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-
-    # 本地文件記錄配置 (可通過環境變數禁用)
-    if os.getenv('ENABLE_FILE_LOGGING', 'true').lower() == 'true':
-        # 確保日誌目錄存在
-        log_dir = Path(__file__).parent.parent / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 滾動日誌文件配置 - 集中式日誌
-        file_handler = RotatingFileHandler(
-            filename=log_dir / 'application.log',
-            maxBytes=10*1024*1024,  # 10MB 後滾動
-            backupCount=5,          # 保留 5 個備份
-            encoding='utf-8'
-        )
-        file_formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s (%(filename)s:%(lineno)d): %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-        
-        # 模塊專屬日誌文件 - 在調用模塊所在目錄
-        if module_log:
-            try:
-                # 獲取調用者的文件路徑
-                caller_frame = inspect.stack()[1]
-                caller_file = Path(caller_frame.filename)
-                caller_dir = caller_file.parent
-                
-                # 使用實際文件名而非模塊名
-                file_name = caller_file.stem  # 獲取文件名（不含擴展名）
-                module_log_file = caller_dir / f"{file_name}.log"
-                
-                # 創建模塊專屬日誌處理器
-                module_handler = RotatingFileHandler(
-                    filename=module_log_file,
-                    maxBytes=5*1024*1024,  # 5MB 後滾動
-                    backupCount=3,         # 保留 3 個備份
-                    encoding='utf-8'
-                )
-                module_handler.setFormatter(StandardFormatter(
-                    '%(asctime)s - %(levelname)s - %(message)s'
-                ))
-                logger.addHandler(module_handler)
-            except (IndexError, AttributeError):
-                # 無法確定調用者位置，跳過模塊專屬日誌
-                pass
+    handlers.append(console_handler)
 
     # Logstash 集成配置 (需顯式啟用)
     if os.getenv('ENABLE_LOGSTASH', 'false').lower() == 'true':
         logstash_host = os.getenv('LOGSTASH_HOST', 'localhost')
         logstash_port = int(os.getenv('LOGSTASH_PORT', 5000))
+        logstash_protocol = os.getenv('LOGSTASH_PROTOCOL', 'tcp').lower()
         
-        # 使用 JSON 格式發送到 Logstash
-        logstash_handler = SocketHandler(logstash_host, logstash_port)
+        # 使用 JSON 格式批次發送到 Logstash (TCP 或 UDP)
+        if logstash_protocol == 'udp':
+            logstash_handler = BatchedDatagramHandler(logstash_host, logstash_port)
+        else:
+            logstash_handler = BatchedSocketHandler(logstash_host, logstash_port)
         logstash_handler.setFormatter(JsonFormatter())
-        logger.addHandler(logstash_handler)
+        handlers.append(logstash_handler)
 
     # Email 通知配置 (需顯式啟用)
-    email_enabled = os.getenv('ENABLE_EMAIL_NOTIFICATION', 'false').lower() == 'true'
-    
-    if email_enabled:
-        try:
-            from .email_handler import EmailNotificationHandler
-            
-            # 獲取 SMTP 設定
-            smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', '587'))
-            smtp_use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
-            
-            # 獲取認證資訊
-            email_from = os.getenv('EMAIL_FROM')
-            email_to = os.getenv('EMAIL_TO')  # 可以是逗號分隔的多個地址
-            email_username = os.getenv('EMAIL_USERNAME', email_from)
-            email_password = os.getenv('EMAIL_PASSWORD')
-            
-            # 獲取專案名稱（從環境變數或使用預設值）
-            project_name = os.getenv('PROJECT_NAME', 'coolpc-webcrawler')
-            
-            if email_from and email_to and email_password:
-                # 將多個接收地址轉換為列表
-                to_addresses = [addr.strip() for addr in email_to.split(',')]
-                
-                # 建立 Email Handler
-                email_handler = EmailNotificationHandler(
-                    mailhost=(smtp_host, smtp_port),
-                    fromaddr=email_from,
-                    toaddrs=to_addresses,
-                    subject=f'[{project_name}] %(levelname)s - %(asctime)s',
-                    credentials=(email_username, email_password) if email_username and email_password else None,
-                    secure=() if smtp_use_tls else None,  # 空元組表示啟用 TLS
-                    timeout=10.0,  # 10 秒超時
-                    project_name=project_name
-                )
-                
-                # 設定日誌級別
-                email_handler.setLevel(logging.ERROR)
-                
-                logger.addHandler(email_handler)
+    try:
+        from .email_handler import EmailNotificationHandler, get_email_config
+        
+        email_config = get_email_config()
+        if email_config.enabled:
+            if email_config.is_complete:
+                # 建立 Email Handler (處理器本身只處理 ERROR 及以上的日誌)
+                email_handler = EmailNotificationHandler.from_config(email_config)
+                handlers.append(email_handler)
             else:
                 print("警告: Email 通知已啟用，但缺少必要的環境變數 (EMAIL_FROM, EMAIL_TO, EMAIL_PASSWORD)")
-                
-        except ImportError as e:
-            print(f"無法初始化 Email 通知 (模組匯入錯誤): {e}")
-        except Exception as e:
-            # 記錄配置錯誤，但不中斷日誌系統初始化
-            print(f"無法初始化 Email 通知: {e}")
+            
+    except ImportError as e:
+        print(f"無法初始化 Email 通知 (模組匯入錯誤): {e}")
+    except Exception as e:
+        # 記錄配置錯誤，但不中斷日誌系統初始化
+        print(f"無法初始化 Email 通知: {e}")
 
-    return logger
+    return tuple(handlers)
 
-class LevelFilter(logging.Filter):
+@functools.cache
+def _queue_handler(module_log_file=None):
     """
-    日誌級別過濾器，只允許特定級別的日誌通過
+    返回指向共用處理器（及模組專屬日誌處理器）的佇列處理器，相同參數共用同一實例
+
+    參數：
+    module_log_file (Path): 模組專屬日誌文件路徑，None 表示不建立
     """
-    def __init__(self, level):
+    handlers = list(_build_shared_handlers())
+
+    # 模塊專屬日誌文件 (可通過環境變數禁用)
+    if module_log_file is not None and _file_logging_enabled():
+        module_handler = FastRotatingFileHandler(
+            filename=module_log_file,
+            maxBytes=5*1024*1024,  # 5MB 後滾動
+            backupCount=3,         # 保留 3 個備份
+            encoding='utf-8'
+        )
+        module_handler.setFormatter(StandardFormatter(
+            '%(asctime)s - %(levelname)s - %(message)s'
+        ))
+        handlers.append(module_handler)
+
+    return LocalQueueHandler(handlers)
+
+class LocalQueueHandler(QueueHandler):
+    """
+    同一程序內使用的佇列處理器
+
+    標準 QueueHandler.prepare 會先格式化記錄並清除 exc_info 以便序列化，
+    導致背景線程的格式器（如 JsonFormatter）無法取得異常資訊且重複格式化。
+    佇列只在程序內傳遞，因此保留原始記錄；當訊息參數皆為不可變類型時，
+    連 `msg % args` 的合併也延遲到背景線程進行，調用端只需入列
+
+    記錄與此處理器指定的目標處理器一起入列，多個日誌記錄器可共用同一佇列與背景線程
+    """
+
+    # 入列後不會被調用端修改的參數類型
+    IMMUTABLE_ARG_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+    def __init__(self, handlers):
+        # 佇列在入列時才解析，fork 後子程序會使用自己的佇列與背景線程
+        super().__init__(None)
+        self.handlers = tuple(handlers)
+        _queue_handlers.add(self)
+
+    def enqueue(self, record):
+        """
+        將記錄放入佇列；佇列已滿或背景線程已停止時在調用端同步處理，
+        背景線程跟不上時以此限制調用端的速度
+        """
+        with _dispatch_lock:
+            if not _synchronous:
+                try:
+                    _start_listener().queue.put_nowait((record, self.handlers))
+                    return
+                except Full:
+                    pass
+        LocalQueueListener.dispatch(record, self.handlers)
+
+    def prepare(self, record):
+        args = record.args
+        if type(record.msg) is not str or (args and (
+            isinstance(args, Mapping)
+            or not all(type(arg) in self.IMMUTABLE_ARG_TYPES for arg in args)
+        )):
+            # 參數可能在入列後被修改，先合併為最終訊息
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LocalQueueListener(QueueListener):
+    """
+    配合 LocalQueueHandler 使用的背景線程，將記錄交給其入列時指定的目標處理器
+    """
+
+    def enqueue_sentinel(self):
+        # 佇列有容量上限，等待空位放入結束標記
+        self.queue.put(self._sentinel)
+
+    def handle(self, item):
+        self.dispatch(*item)
+
+    @staticmethod
+    def dispatch(record, handlers):
+        if record.args:
+            # 延遲的 `msg % args` 只合併一次，各處理器直接使用最終訊息
+            try:
+                record.msg = record.getMessage()
+                record.args = None
+            except Exception:
+                # 保留原記錄，由各處理器格式化時經 handleError 回報
+                pass
+        for handler in handlers:
+            # 與 respect_handler_level=True 相同，遵守各處理器的級別設定
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class FastRotatingFileHandler(RotatingFileHandler):
+    """
+    以計數器追蹤文件大小的旋轉文件處理器
+
+    標準 RotatingFileHandler 每筆記錄都會呼叫 os.path.exists / isfile 並 seek/tell
+    取得文件大小，且格式化兩次（滾動檢查一次、寫入一次）。
+    此處理器只在開啟文件時檢查一次文件類型與大小，之後以寫入的位元組數累加，
+    滾動檢查簡化為一次整數比較。
+
+    文件以 64KB 緩衝開啟，寫入後不逐筆 flush：ERROR 及以上的記錄立即 flush，
+    其餘由共用的背景線程每 FLUSH_INTERVAL 秒 flush 一次；fork 出的子程序中改為逐筆 flush
+
+    注意：若有其他程序同時寫入同一文件，計數器不會反映其寫入量
+    """
+
+    BUFFER_SIZE = 64 * 1024       # 文件寫入緩衝大小
+    FLUSH_LEVEL = logging.ERROR   # 達到此級別的記錄立即 flush
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 初始化完成（已有鎖與文件流）後才登記，fork 鉤子不會遇到未初始化的處理器
+        _periodic_flush(self)
+
+    def _open(self):
+        stream = self._builtin_open(
+            self.baseFilename, self.mode, buffering=self.BUFFER_SIZE,
+            encoding=self.encoding, errors=self.errors
+        )
+        # 文件類型只在開啟時檢查一次，非一般文件（如 /dev/null）永不滾動
+        self._is_regular_file = os.path.isfile(self.baseFilename)
+        self._cached_size = os.path.getsize(self.baseFilename) if self._is_regular_file else 0
+        return stream
+
+    def _encoded_size(self, msg):
+        return len(msg.encode(self.encoding or 'utf-8', 'replace'))
+
+    def _exceeds(self, size):
+        return self._is_regular_file and 0 < self.maxBytes <= self._cached_size + size
+
+    def shouldRollover(self, record):
+        if self.stream is None:  # delay 模式下尚未開啟文件
+            self.stream = self._open()
+        return self._exceeds(self._encoded_size(self.format(record) + self.terminator))
+
+    def emit(self, record):
+        try:
+            # 只格式化一次，同一份結果用於滾動檢查與寫入
+            msg = self.format(record) + self.terminator
+            size = self._encoded_size(msg)
+            if self.stream is None:
+                self.stream = self._open()
+            if self._exceeds(size):
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._cached_size += size
+            if record.levelno >= self.FLUSH_LEVEL or _in_forked_child:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+FLUSH_INTERVAL = 1.0                 # 緩衝文件的定時 flush 間隔（秒）
+_in_forked_child = False             # fork 出的子程序中逐筆 flush
+_flush_targets = weakref.WeakSet()   # 需要定時 flush 的處理器
+_flush_lock = threading.Lock()       # 保護 _flush_targets 的登記與迭代
+
+def _periodic_flush(handler):
+    """登記處理器由背景線程定時 flush，首次調用時啟動線程"""
+    with _flush_lock:
+        _flush_targets.add(handler)
+    _start_flusher()
+
+def _flush_handlers():
+    """返回目前登記的處理器快照，可在鎖外安全迭代"""
+    with _flush_lock:
+        return list(_flush_targets)
+
+@functools.cache
+def _start_flusher():
+    def run():
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            for handler in _flush_handlers():
+                try:
+                    handler.flush()
+                except Exception:
+                    # 文件已關閉或無法寫入，留待下一筆記錄的 emit 回報錯誤；
+                    # 任何例外都不應結束此線程，否則之後的記錄將一直留在緩衝中
+                    pass
+
+    threading.Thread(target=run, name='log-flusher', daemon=True).start()
+
+_fork_held_handlers = []  # fork 期間持有鎖的處理器
+
+def _before_fork():
+    """
+    fork 前寫出所有文件緩衝，並在 fork 期間持有處理器鎖，
+    避免未寫出的內容被子程序複製後由父子程序各寫出一次
+    """
+    for handler in _flush_handlers():
+        try:
+            handler.acquire()
+        except Exception:
+            # 單一處理器失敗不應影響其餘處理器的 flush
+            continue
+        _fork_held_handlers.append(handler)
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+def _after_fork_in_parent():
+    while _fork_held_handlers:
+        _fork_held_handlers.pop().release()
+
+def _after_fork_in_child():
+    global _flush_lock, _dispatch_lock, _setup_lock, _in_forked_child
+    # 鎖可能在 fork 時被其他線程持有，子程序中重新建立
+    _flush_lock = threading.Lock()
+    _dispatch_lock = threading.Lock()
+    _setup_lock = threading.RLock()
+    # 子程序不會繼承背景線程，下一筆記錄時啟動新的線程與佇列
+    _start_listener.cache_clear()
+    while _fork_held_handlers:
+        try:
+            _fork_held_handlers.pop().release()
+        except RuntimeError:
+            # logging 已在子程序中重新初始化處理器鎖
+            pass
+    # 子程序不會繼承 flush 線程；且子程序可能未執行退出鉤子就被終止
+    # (如 multiprocessing Pool.terminate)，因此改為逐筆 flush
+    _start_flusher.cache_clear()
+    _in_forked_child = True
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_after_fork_in_child
+    )
+
+
+class LevelRoutingFileHandler(logging.Handler):
+    """
+    級別分流文件處理器，依記錄的級別寫入對應的日誌文件
+
+    取代「每個級別各一個處理器 + 級別過濾器」的組合，
+    每筆記錄只需一次字典查找，且只會有一個文件處理器進行格式化與滾動檢查。
+    各級別文件延遲到該級別第一筆記錄時才開啟，未使用的級別不佔用文件描述符
+    """
+    def __init__(self, level_files, maxBytes=0, backupCount=0, encoding=None):
         super().__init__()
-        self.level = level
-        
-    def filter(self, record):
-        # 只讓指定級別的日誌通過
-        return record.levelno == self.level 
\ No newline at end of file
+        self.handlers = {
+            level: FastRotatingFileHandler(
+                filename=log_file,
+                maxBytes=maxBytes,
+                backupCount=backupCount,
+                encoding=encoding,
+                delay=True
+            )
+            for level, log_file in level_files.items()
+        }
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for handler in self.handlers.values():
+            handler.setFormatter(fmt)
+
+    def emit(self, record):
+        # 非標準級別的記錄不寫入任何級別文件
+        handler = self.handlers.get(record.levelno)
+        if handler is not None:
+            # 經 handle() 取得子處理器的鎖，與定時 flush 互斥
+            handler.handle(record)
+
+    def flush(self):
+        for handler in self.handlers.values():
+            handler.flush()
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
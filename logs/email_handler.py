@@ -1,15 +1,99 @@
+import email.utils
+import functools
 import logging
 import os
+import smtplib
+from dataclasses import dataclass, field
+from email.message import EmailMessage
 from logging.handlers import SMTPHandler
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from .background_sender import BackgroundSenderMixin
 
-class EmailNotificationHandler(SMTPHandler):
+
+DEFAULT_DEDUP_WINDOW = 300.0   # 相同來源的通知在此秒數內只發送一次
+DEDUP_CACHE_SIZE = 128         # 去重記錄超過此數量時清除過期項目
+
+
+@dataclass(frozen=True)
+class EmailConfig:
+    """
+    Email 通知設定
+    由環境變數讀取，透過 get_email_config() 取得程序共用的實例
+    """
+    enabled: bool = False
+    smtp_host: str = 'smtp.gmail.com'
+    smtp_port: int = 587
+    use_tls: bool = True
+    email_from: Optional[str] = None
+    to_addresses: Tuple[str, ...] = ()
+    username: Optional[str] = None
+    password: Optional[str] = field(default=None, repr=False)
+    project_name: str = 'coolpc-webcrawler'
+    dedup_window: float = DEFAULT_DEDUP_WINDOW
+
+    @classmethod
+    def from_env(cls) -> 'EmailConfig':
+        """
+        從環境變數建立設定，未啟用時不解析其餘變數
+        """
+        if os.getenv('ENABLE_EMAIL_NOTIFICATION', 'false').lower() != 'true':
+            return cls(enabled=False)
+
+        email_from = os.getenv('EMAIL_FROM')
+        email_to = os.getenv('EMAIL_TO', '')  # 可以是逗號分隔的多個地址
+        return cls(
+            enabled=True,
+            smtp_host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+            smtp_port=int(os.getenv('SMTP_PORT', '587')),
+            use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+            email_from=email_from,
+            to_addresses=tuple(addr.strip() for addr in email_to.split(',') if addr.strip()),
+            username=os.getenv('EMAIL_USERNAME', email_from),
+            password=os.getenv('EMAIL_PASSWORD'),
+            project_name=os.getenv('PROJECT_NAME', 'coolpc-webcrawler'),
+            dedup_window=float(os.getenv('EMAIL_DEDUP_WINDOW', DEFAULT_DEDUP_WINDOW))
+        )
+
+    @property
+    def is_complete(self) -> bool:
+        """是否具備發送郵件的必要設定 (EMAIL_FROM, EMAIL_TO, EMAIL_PASSWORD)"""
+        return bool(self.email_from and self.to_addresses and self.password)
+
+    @property
+    def credentials(self) -> Optional[tuple]:
+        return (self.username, self.password) if self.username and self.password else None
+
+    @property
+    def secure(self) -> Optional[tuple]:
+        return () if self.use_tls else None  # 空元組表示啟用 TLS
+
+
+@functools.cache
+def get_email_config() -> EmailConfig:
+    """
+    取得 Email 通知設定，環境變數只在首次調用時讀取
+    """
+    return EmailConfig.from_env()
+
+
+class EmailNotificationHandler(BackgroundSenderMixin, SMTPHandler):
     """
     Email 通知處理器
     當日誌級別達到 ERROR 或以上時，透過 Email 發送通知
-    繼承自 Python 標準庫的 SMTPHandler，提供增強功能
+    繼承自 Python 標準庫的 SMTPHandler，提供增強功能：
+    - 相同來源（級別、模組、行號）的通知在去重時間窗內只發送一次
+    - 郵件由背景線程發送並重用 SMTP 連線，避免每封郵件重新握手及阻塞調用端
     """
+
+    SENDER_NAME = 'email-sender'
+    FLUSH_TIMEOUT = 30.0  # SMTP 握手與發送較慢，flush() 等待較久
+
+    LEVEL_EMOJI = {
+        'WARNING': '⚠️',
+        'ERROR': '❌',
+        'CRITICAL': '🚨'
+    }
     
     def __init__(
         self,
@@ -20,7 +104,8 @@ class EmailNotificationHandler(SMTPHandler):
         credentials: Optional[tuple] = None,
         secure: Optional[tuple] = None,
         timeout: float = 5.0,
-        project_name: str = "專案"
+        project_name: str = "專案",
+        dedup_window: float = DEFAULT_DEDUP_WINDOW
     ):
         """
         初始化 Email 通知 Handler
@@ -34,6 +119,7 @@ class EmailNotificationHandler(SMTPHandler):
             secure (tuple, optional): TLS 設定，通常為空元組 () 表示啟用 TLS
             timeout (float): SMTP 連線逾時時間（秒），預設 5.0
             project_name (str): 專案名稱，會顯示在郵件中
+            dedup_window (float): 相同來源通知的去重時間窗（秒），預設 300.0，設為 0 停用
         """
         super().__init__(
             mailhost=mailhost,
@@ -46,6 +132,7 @@ class EmailNotificationHandler(SMTPHandler):
         )
         
         self.project_name = project_name
+        self.dedup_window = dedup_window
         self.setLevel(logging.ERROR)  # 只處理 ERROR 及以上的日誌
         
         # 設定格式器，包含完整的日誌資訊
@@ -58,17 +145,56 @@ class EmailNotificationHandler(SMTPHandler):
             '函數: %(funcName)s\n'
             '\n訊息:\n%(message)s\n'
         ))
+
+        self._last_sent = {}  # (級別, 模組, 行號) -> 最近一次發送的記錄時間
+        self._smtp = None     # 重用的 SMTP 連線，只由發送線程使用
+        self._init_sender()
     
+    @classmethod
+    def from_config(cls, config: EmailConfig, timeout: float = 10.0) -> 'EmailNotificationHandler':
+        """
+        依 EmailConfig 建立 Handler
+
+        參數:
+            config (EmailConfig): Email 通知設定
+            timeout (float): SMTP 連線逾時時間（秒），預設 10.0
+        """
+        return cls(
+            mailhost=(config.smtp_host, config.smtp_port),
+            fromaddr=config.email_from,
+            toaddrs=list(config.to_addresses),
+            subject=f'[{config.project_name}] %(levelname)s - %(asctime)s',
+            credentials=config.credentials,
+            secure=config.secure,
+            timeout=timeout,
+            project_name=config.project_name,
+            dedup_window=config.dedup_window
+        )
+
     def emit(self, record: logging.LogRecord):
         """
         發送日誌記錄到 Email
-        增強版本，添加專案名稱到記錄中
+        增強版本，添加專案名稱到記錄中，重複通知直接略過，
+        郵件內容在此格式化後交由背景線程發送
         """
+        # 低於處理器級別的記錄直接略過，避免格式化與 SMTP 開銷
+        if record.levelno < self.level:
+            return
+
         # 添加專案名稱到記錄中，供格式器使用
         record.project_name = self.project_name
         
         try:
-            super().emit(record)
+            if self._is_duplicate(record):
+                return
+            # 先格式化內容（同時設定 record.asctime），再生成主題
+            body = self.format(record)
+            item = (record, self.getSubject(record), body)
+            if self._enqueue(item):
+                return
+            # 處理器已關閉：同步發送並立即關閉連線，不留下未關閉的連線
+            self._deliver(*item)
+            self._disconnect()
         except Exception:
             # Email 發送錯誤不應中斷程式，僅記錄錯誤
             self.handleError(record)
@@ -77,12 +203,7 @@ class EmailNotificationHandler(SMTPHandler):
         """
         覆寫主題生成方法，提供更詳細的主題
         """
-        level_emoji = {
-            'WARNING': '⚠️',
-            'ERROR': '❌',
-            'CRITICAL': '🚨'
-        }
-        emoji = level_emoji.get(record.levelname, '⚠️')
+        emoji = self.LEVEL_EMOJI.get(record.levelname, '⚠️')
         
         # 格式化主題，包含專案名稱、級別和時間
         subject = self.subject % {
@@ -93,3 +214,94 @@ class EmailNotificationHandler(SMTPHandler):
         
         return f"{emoji} {subject}"
 
+    def close(self):
+        """
+        停止發送線程，送出剩餘郵件後關閉 SMTP 連線
+        """
+        self._stop_sender()
+        self._disconnect()
+        super().close()
+
+    def _reset_after_fork(self):
+        """直接關閉繼承的 SMTP 連線副本（不送出 QUIT，以免中斷父程序的連線）"""
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            smtp.close()
+
+    def _is_duplicate(self, record: logging.LogRecord) -> bool:
+        """檢查相同來源的通知是否已在去重時間窗內發送過"""
+        if self.dedup_window <= 0:
+            return False
+        key = (record.levelname, record.module, record.lineno)
+        last_sent = self._last_sent.get(key)
+        if last_sent is not None and record.created - last_sent < self.dedup_window:
+            return True
+        self._last_sent[key] = record.created
+        if len(self._last_sent) > DEDUP_CACHE_SIZE:
+            self._last_sent = {
+                k: t for k, t in self._last_sent.items()
+                if record.created - t < self.dedup_window
+            }
+        return False
+
+    def _run(self):
+        """背景發送線程：依序發送佇列中的郵件，收到 None 時結束"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, record: logging.LogRecord, subject: str, body: str):
+        """組合並發送郵件，連線已被伺服器關閉時重新連線重試一次"""
+        msg = EmailMessage()
+        msg['From'] = self.fromaddr
+        msg['To'] = ','.join(self.toaddrs)
+        msg['Subject'] = subject
+        msg['Date'] = email.utils.localtime()
+        msg.set_content(body)
+        try:
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._disconnect()
+                self._connection().send_message(msg)
+        except Exception:
+            self._disconnect()
+            self.handleError(record)
+
+    def _connection(self) -> smtplib.SMTP:
+        """取得 SMTP 連線，已存在的連線先以 NOOP 確認仍可用"""
+        if self._smtp is not None:
+            try:
+                code, _ = self._smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                code = None
+            if code != 250:
+                self._disconnect()
+
+        if self._smtp is None:
+            smtp = smtplib.SMTP(
+                self.mailhost, self.mailport or smtplib.SMTP_PORT, timeout=self.timeout
+            )
+            if self.username:
+                if self.secure is not None:
+                    smtp.ehlo()
+                    smtp.starttls(*self.secure)
+                    smtp.ehlo()
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        """關閉 SMTP 連線，忽略連線已失效時的錯誤"""
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
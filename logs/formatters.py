@@ -1,18 +1,146 @@
 import logging
 import json
-from datetime import datetime
 import socket
 import sys
+import time
+from typing import Any, Optional
+
+try:
+    import msgspec  # 可選依賴：依固定結構直接編碼的 C 擴展，速度優於 orjson
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson  # 可選依賴：C 實作的 JSON 編碼器，直接輸出 UTF-8 bytes
+except ImportError:
+    orjson = None
+
+def _stdlib_json_str(data):
+    # 禁用 ASCII 轉碼以支持中文，緊湊分隔符與 orjson 輸出一致
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+if orjson is not None:
+    def _json_bytes(data):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # orjson 不支援的值（如超過 64 位元的整數）改由標準庫編碼
+            return _stdlib_json_str(data).encode('utf-8')
+
+    def _json_str(data):
+        return _json_bytes(data).decode('utf-8')
+else:
+    _json_str = _stdlib_json_str
+
+    def _json_bytes(data):
+        return _stdlib_json_str(data).encode('utf-8')
+
+if msgspec is not None:
+    class LogRecordMsg(msgspec.Struct):
+        """JsonFormatter 的輸出結構，字段順序即 JSON 鍵順序"""
+        timestamp: str = msgspec.field(name='@timestamp')
+        level: str
+        logger: str
+        message: str
+        module: str
+        function: Optional[str]
+        line: int
+        path: str
+        host: str
+        exception: Any = msgspec.UNSET  # UNSET 的字段不會輸出
+        extra: Any = msgspec.UNSET
 
 class JsonFormatter(logging.Formatter):
     """ELK 專用日誌格式器，生成結構化 JSON 日誌"""
+
+    # formatTime 預設輸出 ISO 8601 格式 (含毫秒)
+    default_time_format = '%Y-%m-%dT%H:%M:%S'
+    default_msec_format = '%s.%03d'
+
+    # 無異常與額外上下文時的固定結構，鍵順序與 _log_data 相同
+    TEMPLATE = '{"@timestamp":"%s",%s,"message":%s,%s}'
+    SITE_CACHE_SIZE = 1024  # 快取的呼叫位置數量上限，超過時清空
+
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self._host = socket.gethostname()  # 主機名稱只在建構時取得一次，避免每筆記錄的系統呼叫
+        self._second_cache = (None, '')     # (整數秒, 已格式化的日期時間字串)
+        self._site_cache = {}               # 呼叫位置 -> 預先編碼的固定 JSON 片段
+        self._encoder = msgspec.json.Encoder() if msgspec is not None else None
+
+    def formatTime(self, record, datefmt=None):
+        """覆寫時間格式方法，同一秒內的記錄共用已格式化的日期時間，只補上毫秒"""
+        if datefmt:
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cached_second, prefix = self._second_cache
+        if second != cached_second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._second_cache = (second, prefix)
+        return self.default_msec_format % (prefix, record.msecs)
     
     def format(self, record):
         """覆寫格式方法，生成符合 ELK 標準的日誌結構"""
+        if self._encoder is not None:
+            return self._encoder.encode(self._log_msg(record)).decode('utf-8')
+        if self._use_template(record):
+            return self._format_template(record)
+        return _json_str(self._log_data(record))
+
+    def format_bytes(self, record):
+        """生成 UTF-8 編碼的 JSON 日誌，供 socket 等需要 bytes 的目標直接使用"""
+        if self._encoder is not None:
+            return self._encoder.encode(self._log_msg(record))
+        if self._use_template(record):
+            return self._format_template(record).encode('utf-8')
+        return _json_bytes(self._log_data(record))
+
+    def _use_template(self, record):
+        # orjson 編碼整個字典已與模板組合一樣快，只在使用標準庫 json 時走快速路徑
+        return msgspec is None and orjson is None and not record.exc_info and not hasattr(record, 'extra')
+
+    def _format_template(self, record):
+        """
+        常見情況的快速路徑：除訊息與時間外的字段在同一呼叫位置都相同，
+        預先編碼後快取，每筆記錄只需編碼訊息並以模板組合
+        """
+        key = (record.levelname, record.name, record.pathname, record.lineno, record.funcName)
+        segments = self._site_cache.get(key)
+        if segments is None:
+            segments = self._site_segments(record)
+            if len(self._site_cache) >= self.SITE_CACHE_SIZE:
+                self._site_cache.clear()
+            self._site_cache[key] = segments
+
+        timestamp = self.formatTime(record, self.datefmt)
+        if self.datefmt:
+            # 自訂時間格式可能含需轉義的字元
+            timestamp = _json_str(timestamp)[1:-1]
+        head, tail = segments
+        return self.TEMPLATE % (timestamp, head, _json_str(record.getMessage()), tail)
+
+    def _site_segments(self, record):
+        """編碼訊息前後的固定字段，與 _log_data 使用相同編碼器以確保輸出一致"""
+        head = _json_str({
+            'level': record.levelname,
+            'logger': record.name
+        })[1:-1]
+        tail = _json_str({
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'path': record.pathname,
+            'host': self._host
+        })[1:-1]
+        return head, tail
+
+    def _log_data(self, record):
+        """組合日誌結構字典"""
         
         # 基礎字段 (所有日誌必備)
         log_data = {
-            '@timestamp': datetime.now().isoformat(),  # ISO 8601 時間格式，ELK 時間戳標準
+            '@timestamp': self.formatTime(record, self.datefmt),  # 記錄建立時間，ISO 8601 格式，ELK 時間戳標準
             'level': record.levelname,                 # 日誌級別 (DEBUG/INFO/WARNING/ERROR/CRITICAL)
             'logger': record.name,                     # 日誌記錄器名稱，用於識別來源模組
             'message': record.getMessage(),            # 原始日誌訊息內容
@@ -20,35 +148,65 @@ class JsonFormatter(logging.Formatter):
             'function': record.funcName,               # 產生日誌的函數名稱
             'line': record.lineno,                     # 產生日誌的程式碼行號
             'path': record.pathname,                    # 原始碼文件完整路徑
-            'host': socket.gethostname()
+            'host': self._host
         }
 
         # 異常資訊處理 (當有異常發生時自動添加)
         if record.exc_info:
-            log_data['exception'] = {
-                'type': record.exc_info[0].__name__,          # 異常類型
-                'message': str(record.exc_info[1]),           # 異常訊息
-                'stack_trace': self.formatException(record.exc_info)  # 完整堆疊追蹤
-            }
+            log_data['exception'] = self._exception_data(record)
 
         # 添加額外上下文
         if hasattr(record, 'extra'):
             log_data['extra'] = record.extra
 
-        return json.dumps(log_data, ensure_ascii=False)  # 禁用 ASCII 轉碼以支持中文
+        return log_data
+
+    def _log_msg(self, record):
+        """組合 msgspec 日誌結構，字段與 _log_data 相同"""
+        return LogRecordMsg(
+            timestamp=self.formatTime(record, self.datefmt),
+            level=record.levelname,
+            logger=record.name,
+            message=record.getMessage(),
+            module=record.module,
+            function=record.funcName,
+            line=record.lineno,
+            path=record.pathname,
+            host=self._host,
+            exception=self._exception_data(record) if record.exc_info else msgspec.UNSET,
+            extra=getattr(record, 'extra', msgspec.UNSET)
+        )
+
+    def _exception_data(self, record):
+        """異常資訊字段"""
+        return {
+            'type': record.exc_info[0].__name__,          # 異常類型
+            'message': str(record.exc_info[1]),           # 異常訊息
+            'stack_trace': self.formatException(record.exc_info)  # 完整堆疊追蹤
+        }
 
 class StandardFormatter(logging.Formatter):
-    """本地存儲用日誌格式器，生成易讀的文字格式"""
-    
-    def format(self, record):
-        """覆寫格式方法，生成標準文字日誌"""
-        # 基礎格式：時間 - 級別 - 訊息
-        base_format = super().format(record)
-        
-        # 追加模組與行號資訊
-        if record.exc_info:
-            return f"{base_format}\n[模組 {record.module}:{record.lineno}]"
-        return f"{base_format} [模組 {record.module}:{record.lineno}]"
+    """本地存儲用日誌格式器，生成易讀的文字格式，並附加模組與行號資訊"""
+
+    # 各格式風格的模組與行號後綴，與預設格式
+    LOCATION_FORMATS = {
+        '%': ' [模組 %(module)s:%(lineno)d]',
+        '{': ' [模組 {module}:{lineno}]',
+        '$': ' [模組 ${module}:${lineno}]',
+    }
+    DEFAULT_FORMATS = {
+        '%': logging.PercentStyle.default_format,
+        '{': logging.StrFormatStyle.default_format,
+        '$': logging.StringTemplateStyle.default_format,
+    }
+
+    def __init__(self, fmt=None, datefmt=None, style='%', *args, **kwargs):
+        if style not in self.LOCATION_FORMATS:
+            raise ValueError('Style must be one of: %s' % ','.join(self.LOCATION_FORMATS))
+        if fmt is None:
+            fmt = self.DEFAULT_FORMATS[style]
+        # 模組與行號直接寫入格式字串，由格式風格一次完成格式化
+        super().__init__(fmt + self.LOCATION_FORMATS[style], datefmt, style, *args, **kwargs)
 
 class ColoredFormatter(logging.Formatter):
     """為控制台輸出添加顏色的格式化器"""
@@ -66,12 +224,27 @@ class ColoredFormatter(logging.Formatter):
         if fmt is None:
             fmt = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
         super().__init__(fmt, datefmt)
+        # 控制台輸出被重導向至文件或管道時不加顏色
+        stream = sys.stderr
+        self._enabled = stream is not None and hasattr(stream, 'isatty') and stream.isatty()
+        # 預先組合帶顏色的級別名稱，避免每筆記錄重複拼接字串
+        reset = self.COLORS['RESET']
+        self._colored = {
+            name: f"{code}{name}{reset}"
+            for name, code in self.COLORS.items() if name != 'RESET'
+        }
     
     def format(self, record):
+        if not self._enabled:
+            return super().format(record)
+
+        # 只在格式化期間替換級別名稱，完成後還原，避免影響同一記錄的其他處理器
         levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[levelname]}{levelname}{self.COLORS['RESET']}"
-        return super().format(record)
+        record.levelname = self._colored.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 class FileFormatter(logging.Formatter):
     """為文件輸出優化的格式化器，添加模塊名和行號"""
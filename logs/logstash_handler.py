@@ -0,0 +1,209 @@
+import logging
+import queue
+import socket
+import threading
+from logging.handlers import SocketHandler
+
+from .background_sender import BackgroundSenderMixin
+
+
+BATCH_SIZE = 32                   # 單次發送最多合併的記錄數
+DEFAULT_BATCH_TIMEOUT = 100e-6    # 等待湊滿批次的時間上限（秒），即 100µs
+DEFAULT_QUEUE_SIZE = 10000        # 待發送佇列容量，滿時退回同步發送
+DEFAULT_MAX_DATAGRAM_SIZE = 1472  # 單個 UDP 資料報上限，乙太網路 MTU 扣除 IP/UDP 標頭，避免分片
+MAX_UDP_PAYLOAD = 65507           # IPv4 UDP 資料報的最大酬載
+
+
+class BatchedSocketHandler(BackgroundSenderMixin, SocketHandler):
+    """
+    Logstash 批次發送處理器
+    記錄先放入佇列，由背景線程合併多筆後以一次 sendall() 送出
+    繼承自 Python 標準庫的 SocketHandler，沿用其連線與重試機制
+
+    發送格式為以換行分隔的 JSON（Logstash json_lines codec），而非 SocketHandler 預設的 pickle
+    """
+
+    SENDER_NAME = 'logstash-sender'
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        batch_size: int = BATCH_SIZE,
+        batch_timeout: float = DEFAULT_BATCH_TIMEOUT,
+        queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        """
+        初始化批次發送 Handler
+
+        參數:
+            host (str): Logstash 服務器地址
+            port (int): Logstash 服務器埠
+            batch_size (int): 單次發送最多合併的記錄數，預設 32
+            batch_timeout (float): 等待湊滿批次的時間上限（秒），預設 100µs
+            queue_size (int): 待發送佇列容量，預設 10000
+        """
+        super().__init__(host, port)
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self._send_lock = threading.Lock()  # 背景線程與同步退回路徑共用同一 socket
+        self._init_sender(queue_size)
+
+    def makePickle(self, record: logging.LogRecord) -> bytes:
+        """
+        覆寫序列化方法，輸出一行 UTF-8 JSON
+        """
+        formatter = self.formatter
+        if hasattr(formatter, 'format_bytes'):
+            return formatter.format_bytes(record) + b'\n'
+        return (self.format(record) + '\n').encode('utf-8')
+
+    def emit(self, record: logging.LogRecord):
+        """
+        將記錄放入佇列，佇列已滿時退回同步發送以避免丟失記錄
+
+        處理器關閉後只在連線仍開啟時同步發送，不再重新連線，否則捨棄記錄
+        """
+        if self._enqueue(record):
+            return
+        with self._send_lock:
+            if not self._closing or self.sock is not None:
+                super().emit(record)
+
+    def _run(self):
+        """背景發送線程：取出一批記錄後合併發送，收到 None 時結束"""
+        running = True
+        while running:
+            record = self._queue.get()
+            if record is None:
+                self._queue.task_done()
+                break
+            batch = [record]
+
+            # 在時間上限內盡量湊滿一批
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=self.batch_timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._queue.task_done()
+                    running = False
+                    break
+                batch.append(record)
+
+            self._send_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _send_batch(self, batch):
+        """序列化整批記錄並逐個發送單位送出，發送失敗只影響該單位內的記錄"""
+        chunks = []
+        for record in batch:
+            try:
+                chunks.append((record, self.makePickle(record)))
+            except Exception:
+                self.handleError(record)
+        for records, payload in self._payloads(chunks):
+            try:
+                with self._send_lock:
+                    self.send(payload)
+            except Exception:
+                for record in records:
+                    self.handleError(record)
+
+    def _payloads(self, chunks):
+        """
+        將序列化後的記錄合併為發送單位，返回 (記錄列表, 資料)
+        TCP 串流整批合併為一次 sendall()
+        """
+        if chunks:
+            records, data = zip(*chunks)
+            yield records, b''.join(data)
+
+    def close(self):
+        """
+        停止背景線程並送出佇列中剩餘的記錄後關閉連線
+        """
+        self._stop_sender()
+        super().close()
+
+    def _reset_after_fork(self):
+        """關閉繼承的 socket 副本，子程序之後建立自己的連線"""
+        self._send_lock = threading.Lock()
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.close()  # 只關閉子程序的檔案描述符，不影響父程序的連線
+            except OSError:
+                pass
+
+
+class BatchedDatagramHandler(BatchedSocketHandler):
+    """
+    Logstash UDP 批次發送處理器
+    以 UDP 資料報發送，無需建立連線，也不等待 ACK 或受 Nagle 緩衝影響
+    同一批記錄合併為不超過 max_datagram_size 的資料報，超過上限的單筆記錄獨立發送，
+    超過 UDP 資料報最大酬載 (65507 位元組) 的記錄無法送出而捨棄
+
+    Logstash 端需使用 udp input 搭配 json_lines codec；UDP 不保證送達
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_datagram_size: int = DEFAULT_MAX_DATAGRAM_SIZE,
+        **kwargs
+    ):
+        """
+        初始化 UDP 批次發送 Handler
+
+        參數:
+            host (str): Logstash 服務器地址
+            port (int): Logstash 服務器埠
+            max_datagram_size (int): 單個資料報的位元組上限，預設 1472
+            **kwargs: 傳遞給 BatchedSocketHandler 的批次設定
+        """
+        self.max_datagram_size = max_datagram_size
+        super().__init__(host, port, **kwargs)
+        self.closeOnError = False
+
+    def makeSocket(self, timeout=1):
+        """
+        覆寫建立 socket 方法，使用 UDP
+        """
+        family = socket.AF_UNIX if self.port is None else socket.AF_INET
+        return socket.socket(family, socket.SOCK_DGRAM)
+
+    def makePickle(self, record: logging.LogRecord) -> bytes:
+        """
+        序列化記錄，超過單個 UDP 資料報上限的記錄無法送出，拋出 ValueError 交由 handleError 處理
+        """
+        data = super().makePickle(record)
+        if len(data) > MAX_UDP_PAYLOAD:
+            raise ValueError(
+                f'記錄大小 {len(data)} 位元組超過 UDP 資料報上限 {MAX_UDP_PAYLOAD}，已捨棄'
+            )
+        return data
+
+    def send(self, s: bytes):
+        """
+        覆寫發送方法，以 sendto() 發送單個資料報
+        """
+        if self.sock is None:
+            self.createSocket()
+        self.sock.sendto(s, self.address)
+
+    def _payloads(self, chunks):
+        """依資料報大小上限將記錄分組，返回 (記錄列表, 資料報)"""
+        records, datagram, size = [], [], 0
+        for record, chunk in chunks:
+            if datagram and size + len(chunk) > self.max_datagram_size:
+                yield records, b''.join(datagram)
+                records, datagram, size = [], [], 0
+            records.append(record)
+            datagram.append(chunk)
+            size += len(chunk)
+        if datagram:
+            yield records, b''.join(datagram)
@@ -0,0 +1,6 @@
+import logging
+
+
+def make_record(msg='m', level=logging.INFO, args=None, name='test', pathname='/src/p.py', lineno=1):
+    """建立測試用的日誌記錄，模組名稱由 pathname 推得（預設為 'p'）"""
+    return logging.LogRecord(name, level, pathname, lineno, msg, args, None)
@@ -0,0 +1,304 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from logs import config
+
+from helpers import make_record
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / 'logs'
+
+
+class SetupLoggerProcessTest(unittest.TestCase):
+    """
+    在子程序中執行使用 setup_logger 的腳本並檢查輸出的日誌文件
+
+    日誌目錄位於套件目錄內，因此每個測試都在臨時目錄中使用套件的副本
+    """
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        shutil.copytree(PACKAGE_DIR, self.tmp / 'logs',
+                        ignore=shutil.ignore_patterns('__pycache__', '*.log*'))
+
+    def run_script(self, source, **env):
+        script = self.tmp / 'script.py'
+        script.write_text(textwrap.dedent(source), encoding='utf-8')
+        result = subprocess.run(
+            [sys.executable, str(script)],
+            cwd=self.tmp,
+            env={**os.environ, 'ENABLE_LOGSTASH': 'false',
+                 'ENABLE_EMAIL_NOTIFICATION': 'false', **env},
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result
+
+    def application_log(self):
+        return (self.tmp / 'logs' / 'application.log').read_text(encoding='utf-8')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 os.fork')
+    def test_buffered_lines_are_not_duplicated_by_fork(self):
+        self.run_script('''
+            import os, sys, time
+            from logs.config import setup_logger
+
+            lg = setup_logger('p')
+            lg.info('parent before fork')
+            time.sleep(0.2)
+            pid = os.fork()
+            if pid == 0:
+                sys.exit(0)
+            os.waitpid(pid, 0)
+        ''')
+        self.assertEqual(self.application_log().count('parent before fork'), 1)
+
+    def test_queued_records_drain_at_exit(self):
+        self.run_script('''
+            from logs.config import setup_logger
+
+            lg = setup_logger('drain')
+            for i in range(2000):
+                lg.info('record %d', i)
+        ''')
+        lines = self.application_log().splitlines()
+        self.assertEqual(len(lines), 2000)
+        self.assertTrue(lines[-1].endswith('record 1999'))
+
+    def test_full_queue_dispatches_in_caller(self):
+        result = self.run_script('''
+            import logging, threading, time
+            from logs import config
+
+            config.QUEUE_SIZE = 50
+            handled, callers, sizes = [], set(), []
+
+            class SlowHandler(logging.Handler):
+                def emit(self, record):
+                    time.sleep(0.0005)
+                    handled.append(record.getMessage())
+                    callers.add(threading.current_thread().name)
+                    sizes.append(config._start_listener().queue.qsize())
+
+            lg = logging.getLogger('slow')
+            lg.addHandler(config.LocalQueueHandler([SlowHandler()]))
+            for i in range(1000):
+                lg.warning('record %d', i)
+            config._stop_listener()
+            print(len(handled), max(sizes), 'MainThread' in callers)
+        ''')
+        count, max_size, caller_dispatched = result.stdout.split()
+        self.assertEqual(count, '1000')
+        self.assertLessEqual(int(max_size), 50)
+        self.assertEqual(caller_dispatched, 'True')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 os.fork')
+    def test_forked_child_records_are_written(self):
+        self.run_script('''
+            import os, sys
+            from logs.config import setup_logger
+
+            lg = setup_logger('p')
+            lg.info('parent before fork')
+            pid = os.fork()
+            if pid == 0:
+                lg.info('child after fork')
+                sys.exit(0)
+            os.waitpid(pid, 0)
+        ''')
+        self.assertEqual(self.application_log().count('child after fork'), 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 os.fork')
+    def test_multiprocessing_pool_records_are_written(self):
+        self.run_script('''
+            import multiprocessing
+            from logs.config import setup_logger
+
+            lg = setup_logger('pool')
+
+            def work(n):
+                lg.info('worker %d done', n)
+                return n
+
+            if __name__ == '__main__':
+                lg.info('parent before pool')
+                pool = multiprocessing.get_context('fork').Pool(2)
+                assert pool.map(work, range(4)) == [0, 1, 2, 3]
+                pool.close()
+                pool.join()
+        ''')
+        log = self.application_log()
+        for n in range(4):
+            self.assertIn(f'worker {n} done', log)
+
+
+class LocalQueueListenerTest(unittest.TestCase):
+
+    class Collector(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages, self.errors = [], 0
+
+        def emit(self, record):
+            try:
+                self.messages.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+
+        def handleError(self, record):
+            self.errors += 1
+
+    def test_dispatch_merges_message_once(self):
+        handlers = [self.Collector(), self.Collector()]
+        record = make_record('x=%s', args=(1,))
+        config.LocalQueueListener.dispatch(record, handlers)
+        # 合併後參數已清除，各處理器格式化時不再重複 `msg % args`
+        self.assertEqual((record.msg, record.args), ('x=1', None))
+        self.assertEqual([h.messages for h in handlers], [['x=1'], ['x=1']])
+
+    def test_dispatch_leaves_bad_format_to_handlers(self):
+        handler = self.Collector()
+        record = make_record('%d', args=('x',))
+        config.LocalQueueListener.dispatch(record, [handler])
+        self.assertEqual(record.args, ('x',))
+        self.assertEqual(handler.errors, 1)
+
+
+class FastRotatingFileHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def make_handler(self, name='app.log', **kwargs):
+        handler = config.FastRotatingFileHandler(self.tmp / name, encoding='utf-8', **kwargs)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_registered_for_flush_only_after_initialisation(self):
+        registered = []
+        with mock.patch.object(config, '_periodic_flush',
+                               lambda h: registered.append((hasattr(h, 'lock'), h.stream))):
+            handler = self.make_handler()
+        self.assertEqual(len(registered), 1)
+        self.assertTrue(registered[0][0])
+        self.assertIs(registered[0][1], handler.stream)
+
+    def test_before_fork_skips_handlers_that_cannot_be_acquired(self):
+        class Broken:
+            def acquire(self):
+                raise AttributeError('lock')
+
+        handler = self.make_handler()
+        handler.handle(make_record('buffered'))
+        broken = Broken()
+        with mock.patch.object(config, '_flush_handlers', lambda: [broken, handler]):
+            config._before_fork()
+            try:
+                self.assertEqual(config._fork_held_handlers, [handler])
+                self.assertEqual((self.tmp / 'app.log').read_text(encoding='utf-8'), 'buffered\n')
+            finally:
+                config._after_fork_in_parent()
+
+
+    def test_forked_child_flag_flushes_every_record(self):
+        handler = self.make_handler()
+        handler.handle(make_record('buffered'))
+        self.assertEqual((self.tmp / 'app.log').read_text(encoding='utf-8'), '')
+        with mock.patch.object(config, '_in_forked_child', True):
+            handler.handle(make_record('flushed'))
+        self.assertEqual((self.tmp / 'app.log').read_text(encoding='utf-8'), 'buffered\nflushed\n')
+        self.assertEqual(config.FastRotatingFileHandler.FLUSH_LEVEL, logging.ERROR)
+
+
+    def log(self, handler, *messages):
+        for msg in messages:
+            handler.handle(make_record(msg, logging.ERROR))
+
+    def sizes(self, *names):
+        return [(self.tmp / name).stat().st_size for name in names]
+
+    def test_rollover_counts_encoded_bytes(self):
+        # 每筆 '中文中文' + 換行為 13 位元組（字元數只有 5）
+        handler = self.make_handler(maxBytes=30, backupCount=2)
+        self.log(handler, '中文中文', '中文中文', '中文中文')
+        self.assertEqual(self.sizes('app.log', 'app.log.1'), [13, 26])
+        self.assertFalse((self.tmp / 'app.log.2').exists())
+
+    def test_counter_resets_after_rollover(self):
+        handler = self.make_handler(maxBytes=20, backupCount=3)
+        # 與標準 RotatingFileHandler 相同，寫入後達到 maxBytes 即滾動
+        self.log(handler, 'a' * 15, 'b' * 15, 'c' * 2, 'd' * 15)
+        self.assertEqual(handler._cached_size, 16)
+        self.assertEqual(self.sizes('app.log', 'app.log.1', 'app.log.2'), [16, 19, 16])
+        self.assertEqual((self.tmp / 'app.log.1').read_text(encoding='utf-8'), 'b' * 15 + '\ncc\n')
+
+    def test_existing_file_size_is_counted(self):
+        (self.tmp / 'app.log').write_text('x' * 25 + '\n', encoding='utf-8')
+        handler = self.make_handler(maxBytes=30, backupCount=1)
+        self.log(handler, 'abcdefghij')
+        self.assertEqual(self.sizes('app.log', 'app.log.1'), [11, 26])
+
+    def test_non_regular_file_never_rolls_over(self):
+        handler = config.FastRotatingFileHandler(os.devnull, maxBytes=1, backupCount=1)
+        self.addCleanup(handler.close)
+        with mock.patch.object(handler, 'doRollover') as do_rollover:
+            self.log(handler, 'x' * 100, 'y' * 100)
+        do_rollover.assert_not_called()
+        self.assertFalse(handler.shouldRollover(make_record('z' * 100)))
+
+
+class LevelRoutingFileHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.handler = config.LevelRoutingFileHandler(
+            {level: self.tmp / f'{logging.getLevelName(level).lower()}.log'
+             for level in (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR)},
+            maxBytes=1024, backupCount=1, encoding='utf-8'
+        )
+        self.handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(self.handler.close)
+
+    def log(self, level, msg):
+        self.handler.handle(make_record(msg, level))
+
+    def test_files_open_lazily(self):
+        self.assertEqual(list(self.tmp.iterdir()), [])
+        self.assertTrue(all(h.stream is None for h in self.handler.handlers.values()))
+        self.log(logging.WARNING, 'w')
+        self.assertEqual([p.name for p in self.tmp.iterdir()], ['warning.log'])
+
+    def test_records_are_routed_by_level(self):
+        self.log(logging.DEBUG, 'd')
+        self.log(logging.INFO, 'i')
+        self.log(logging.ERROR, 'e')
+        self.log(logging.INFO, 'i2')
+        self.handler.flush()
+        read = lambda name: (self.tmp / name).read_text(encoding='utf-8')
+        self.assertEqual(read('debug.log'), 'DEBUG d\n')
+        self.assertEqual(read('info.log'), 'INFO i\nINFO i2\n')
+        self.assertEqual(read('error.log'), 'ERROR e\n')
+        self.assertFalse((self.tmp / 'warning.log').exists())
+
+    def test_custom_levels_are_skipped(self):
+        self.log(25, 'between info and warning')
+        self.log(logging.CRITICAL, 'no critical file configured')
+        self.handler.flush()
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import logging
+import os
+import unittest
+from unittest import mock
+
+from logs.email_handler import EmailConfig, EmailNotificationHandler
+
+from helpers import make_record
+
+
+class RecordingHandler(EmailNotificationHandler):
+    """以記錄主題取代實際 SMTP 發送"""
+
+    def __init__(self):
+        super().__init__(('localhost', 25), 'from@example.com', ['to@example.com'],
+                         '%(levelname)s', dedup_window=0)
+        self.delivered = []
+        self.disconnects = 0
+
+    def _deliver(self, record, subject, body):
+        self.delivered.append(record.getMessage())
+
+    def _disconnect(self):
+        self.disconnects += 1
+        super()._disconnect()
+
+
+class EmailNotificationHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.addCleanup(self.handler.close)
+
+    def test_close_delivers_queued_mail(self):
+        for i in range(10):
+            self.handler.handle(make_record(f'error {i}', logging.ERROR))
+        self.handler.close()
+        self.assertEqual(self.handler.delivered, [f'error {i}' for i in range(10)])
+
+    def test_emit_after_close_disconnects(self):
+        self.handler.close()
+        disconnects = self.handler.disconnects
+        self.handler.handle(make_record('after close', logging.ERROR))
+        self.assertEqual(self.handler.delivered, ['after close'])
+        self.assertEqual(self.handler.disconnects, disconnects + 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 os.fork')
+    def test_forked_child_restarts_sender(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                self.handler.handle(make_record('child', logging.ERROR))
+                self.handler.flush()
+                os.write(write_fd, ','.join(self.handler.delivered).encode())
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as pipe:
+            delivered = pipe.read().decode()
+        os.waitpid(pid, 0)
+        self.assertEqual(delivered, 'child')
+
+
+class EmailConfigTest(unittest.TestCase):
+
+    def test_disabled_config_ignores_invalid_values(self):
+        env = {'ENABLE_EMAIL_NOTIFICATION': 'false', 'SMTP_PORT': 'abc', 'EMAIL_DEDUP_WINDOW': 'x'}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(EmailConfig.from_env(), EmailConfig(enabled=False))
+
+    def test_enabled_config_reads_environment(self):
+        env = {'ENABLE_EMAIL_NOTIFICATION': 'true', 'SMTP_PORT': '2525',
+               'EMAIL_FROM': 'a@example.com', 'EMAIL_TO': 'b@example.com, c@example.com',
+               'EMAIL_PASSWORD': 'secret', 'EMAIL_DEDUP_WINDOW': '60'}
+        with mock.patch.dict(os.environ, env):
+            config = EmailConfig.from_env()
+        self.assertTrue(config.enabled and config.is_complete)
+        self.assertEqual(config.smtp_port, 2525)
+        self.assertEqual(config.to_addresses, ('b@example.com', 'c@example.com'))
+        self.assertEqual(config.dedup_window, 60.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import logging
+import sys
+import unittest
+from unittest import mock
+
+from logs import formatters
+from logs.formatters import ColoredFormatter, JsonFormatter, StandardFormatter
+
+from helpers import make_record
+
+
+class StandardFormatterTest(unittest.TestCase):
+
+    def test_default_format_appends_location(self):
+        self.assertEqual(StandardFormatter().format(make_record()), 'm [模組 p:1]')
+
+    def test_location_follows_format_style(self):
+        for style, fmt in (('%', '%(levelname)s %(message)s'),
+                           ('{', '{levelname} {message}'),
+                           ('$', '${levelname} ${message}')):
+            with self.subTest(style=style):
+                formatter = StandardFormatter(fmt, style=style)
+                self.assertEqual(formatter.format(make_record()), 'INFO m [模組 p:1]')
+
+    def test_default_format_per_style(self):
+        self.assertEqual(StandardFormatter(style='{').format(make_record()), 'm [模組 p:1]')
+
+    def test_invalid_style_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StandardFormatter(style='#')
+
+    def test_validate_is_forwarded(self):
+        with self.assertRaises(ValueError):
+            StandardFormatter('{message', style='{')
+        StandardFormatter('{message', style='{', validate=False)
+
+
+class ColoredFormatterTest(unittest.TestCase):
+
+    def make_formatter(self, enabled):
+        formatter = ColoredFormatter('%(levelname)s %(message)s')
+        formatter._enabled = enabled
+        return formatter
+
+    def test_levelname_is_colored_and_restored(self):
+        record = make_record()
+        output = self.make_formatter(True).format(record)
+        self.assertEqual(output, '\033[92mINFO\033[0m m')
+        self.assertEqual(record.levelname, 'INFO')
+        # 同一記錄交給下一個處理器時不帶顏色
+        self.assertEqual(logging.Formatter('%(levelname)s').format(record), 'INFO')
+
+    def test_levelname_is_restored_when_formatting_fails(self):
+        record = make_record()
+        record.msg, record.args = '%d', ('not a number',)
+        with self.assertRaises(TypeError):
+            self.make_formatter(True).format(record)
+        self.assertEqual(record.levelname, 'INFO')
+
+    def test_disabled_formatter_skips_colors(self):
+        record = make_record()
+        self.assertEqual(self.make_formatter(False).format(record), 'INFO m')
+        self.assertEqual(record.levelname, 'INFO')
+
+    def test_enabled_only_for_terminal_stderr(self):
+        for isatty in (True, False):
+            with self.subTest(isatty=isatty), mock.patch('sys.stderr') as stderr:
+                stderr.isatty.return_value = isatty
+                self.assertIs(ColoredFormatter()._enabled, isatty)
+
+
+class JsonFormatterTest(unittest.TestCase):
+
+    def test_wide_integers_are_encoded(self):
+        record = make_record()
+        record.extra = {'n': 2**70}
+        formatter = JsonFormatter()
+        self.assertEqual(json.loads(formatter.format(record))['extra'], {'n': 2**70})
+        self.assertEqual(json.loads(formatter.format_bytes(record))['extra'], {'n': 2**70})
+
+    def test_json_helpers_fall_back_for_wide_integers(self):
+        self.assertEqual(formatters._json_str({'n': 2**70}), '{"n":1180591620717411303424}')
+        self.assertEqual(formatters._json_bytes({'n': 2**70}), b'{"n":1180591620717411303424}')
+
+
+class JsonTemplateTest(unittest.TestCase):
+    """僅安裝標準庫 json 時的模板快速路徑，輸出須與字典編碼完全一致"""
+
+    def setUp(self):
+        for name, value in (('msgspec', None), ('orjson', None),
+                            ('_json_str', formatters._stdlib_json_str)):
+            patcher = mock.patch.object(formatters, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assert_template_matches(self, formatter, record):
+        expected = formatters._stdlib_json_str(formatter._log_data(record))
+        self.assertTrue(formatter._use_template(record))
+        # 第二次調用使用快取的固定片段
+        for _ in range(2):
+            self.assertEqual(formatter._format_template(record), expected)
+        self.assertEqual(formatter.format(record), expected)
+        self.assertEqual(formatter.format_bytes(record), expected.encode('utf-8'))
+
+    def test_escaped_fields(self):
+        record = logging.LogRecord('a"b\\c', logging.WARNING, 'C:\\dir\\"q".py', 7,
+                                   '說 "%s" \\ %d\n', ('hi', 3), None, func=None)
+        self.assertIsNone(record.funcName)
+        self.assert_template_matches(JsonFormatter(), record)
+
+    def test_custom_datefmt(self):
+        record = logging.LogRecord('app', logging.INFO, '/src/app.py', 1, 'm', None, None, func='main')
+        self.assert_template_matches(JsonFormatter(datefmt='%Y "%m" \\ %d'), record)
+
+
+@unittest.skipUnless(formatters.msgspec, '需要 msgspec')
+class JsonMsgspecTest(unittest.TestCase):
+    """msgspec 結構的輸出須與字典編碼的鍵順序及內容一致"""
+
+    def assert_struct_matches(self, record):
+        formatter = JsonFormatter()
+        expected = formatters._stdlib_json_str(formatter._log_data(record))
+        self.assertEqual(formatter.format(record), expected)
+        self.assertEqual(formatter.format_bytes(record), expected.encode('utf-8'))
+        return json.loads(expected)
+
+    def test_plain_record_omits_optional_fields(self):
+        data = self.assert_struct_matches(make_record())
+        self.assertEqual(list(data)[0], '@timestamp')
+        self.assertNotIn('exception', data)
+        self.assertNotIn('extra', data)
+
+    def test_exception_and_extra(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            exc_info = sys.exc_info()
+        record = make_record()
+        record.exc_info = exc_info
+        record.extra = {'user': '使用者', 'n': 2**70}
+        data = self.assert_struct_matches(record)
+        self.assertEqual(list(data)[-2:], ['exception', 'extra'])
+        self.assertEqual(data['exception']['type'], 'ValueError')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import socket
+import threading
+import unittest
+
+from logs.formatters import JsonFormatter
+from logs.logstash_handler import BatchedDatagramHandler, BatchedSocketHandler
+
+from helpers import make_record
+
+
+class TcpCollector:
+    """接受 TCP 連線並收集收到的資料，記錄連線次數"""
+
+    def __init__(self):
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        self.connections = 0
+        self.data = b''
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            while chunk := conn.recv(65536):
+                with self._lock:
+                    self.data += chunk
+
+    def lines(self):
+        with self._lock:
+            return self.data.decode('utf-8').splitlines()
+
+    def close(self):
+        self.server.close()
+
+
+class BatchedSocketHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = TcpCollector()
+        self.addCleanup(self.collector.close)
+        self.handler = BatchedSocketHandler('127.0.0.1', self.collector.port)
+        self.handler.setFormatter(JsonFormatter())
+        self.addCleanup(self.handler.close)
+
+    def wait_for_lines(self, count):
+        for _ in range(200):
+            if len(self.collector.lines()) >= count:
+                break
+            threading.Event().wait(0.01)
+        return self.collector.lines()
+
+    def test_close_sends_queued_records(self):
+        for i in range(100):
+            self.handler.handle(make_record(f'record {i}'))
+        self.handler.close()
+        lines = self.wait_for_lines(100)
+        self.assertEqual(len(lines), 100)
+        self.assertIn('"record 99"', lines[-1])
+
+    def test_emit_after_close_does_not_reconnect(self):
+        self.handler.handle(make_record('before close'))
+        self.handler.close()
+        self.handler.handle(make_record('after close'))
+        self.assertIsNone(self.handler.sock)
+        self.assertNotIn('after close', ''.join(self.wait_for_lines(1)))
+        self.assertEqual(self.collector.connections, 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 os.fork')
+    def test_forked_child_sends_over_its_own_connection(self):
+        self.handler.handle(make_record('parent'))
+        self.handler.flush()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.handler.handle(make_record('child'))
+                self.handler.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        lines = self.wait_for_lines(2)
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"child"', lines[1])
+        self.assertEqual(self.collector.connections, 2)
+
+
+class FlakyDatagramHandler(BatchedDatagramHandler):
+    """第一個資料報發送失敗，並記錄 handleError 收到的記錄"""
+
+    def __init__(self, *args, **kwargs):
+        self.failed = []
+        self.sends = 0
+        super().__init__(*args, **kwargs)
+
+    def send(self, s):
+        self.sends += 1
+        if self.sends == 1:
+            raise OSError('simulated send failure')
+        super().send(s)
+
+    def handleError(self, record):
+        self.failed.append(record.getMessage())
+
+
+class BatchedDatagramHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(('127.0.0.1', 0))
+        self.receiver.settimeout(2)
+        self.addCleanup(self.receiver.close)
+        self.port = self.receiver.getsockname()[1]
+
+    def make_handler(self, cls=BatchedDatagramHandler, **kwargs):
+        handler = cls('127.0.0.1', self.port, **kwargs)
+        handler.setFormatter(JsonFormatter())
+        self.addCleanup(handler.close)
+        return handler
+
+    def received_lines(self):
+        lines = []
+        self.receiver.settimeout(0.2)
+        try:
+            while True:
+                lines.extend(self.receiver.recv(65535).decode('utf-8').splitlines())
+        except socket.timeout:
+            return lines
+
+    def test_failed_datagram_does_not_drop_later_ones(self):
+        handler = self.make_handler(FlakyDatagramHandler, max_datagram_size=1)
+        handler._send_batch([make_record(f'record {i}') for i in range(3)])
+        self.assertEqual(handler.failed, ['record 0'])
+        lines = self.received_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"record 2"', lines[-1])
+
+    def test_oversized_record_is_dropped(self):
+        handler = self.make_handler(FlakyDatagramHandler)
+        handler.sends = 1  # 不模擬發送失敗
+        handler._send_batch([make_record('x' * 70000), make_record('small')])
+        self.assertEqual(handler.failed, ['x' * 70000])
+        lines = self.received_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"small"', lines[0])
+
+
+if __name__ == '__main__':
+    unittest.main()